@@ -2,7 +2,10 @@
 
 from flask import Flask, jsonify, request, render_template
 from config import Config
-from src.models import db  # Импортируем объект db из наших моделей
+from src.models import db, SCHEMA_VERSION  # Импортируем объект db из наших моделей
+from src.compression import compression
+from src.level_index import level_index
+from src.archive import add_soft_delete_columns, archive_command, start_archive_scheduler
 import os
 
 # Импортируем Blueprints
@@ -17,6 +20,10 @@ def create_app(config_class=Config):
 
     # 1. Инициализация расширений
     db.init_app(app)
+    # Сжатие JSON-ответов (gzip/brotli) по заголовку Accept-Encoding
+    compression.init_app(app)
+    # Индекс заданий по уровням игрока для /api/tasks/for-level/<lvl>
+    level_index.init_app(app)
 
     # 2. Регистрация Blueprints (маршрутов)
     # Публичные маршруты доступны по префиксу /api
@@ -24,6 +31,9 @@ def create_app(config_class=Config):
     # Приватные маршруты доступны по префиксу /api/admin
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
+    # Команда `flask archive` для периодического запуска архивации (cron)
+    app.cli.add_command(archive_command)
+
     # 3. Маршрут для Главной страницы (отображение шаблона)
     @app.route('/')
     def index():
@@ -65,6 +75,22 @@ def create_app(config_class=Config):
     return app
 
 
+def get_schema_version(engine):
+    """Читает версию схемы, записанную в файл SQLite (PRAGMA user_version)."""
+    if engine.dialect.name != 'sqlite':
+        return None
+    with engine.connect() as conn:
+        return conn.exec_driver_sql('PRAGMA user_version').scalar()
+
+
+def set_schema_version(engine, version):
+    """Записывает версию схемы в файл SQLite."""
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f'PRAGMA user_version = {int(version)}')
+
+
 def setup_database(app):
     """Создает папки и базу данных, если они не существуют."""
     with app.app_context():
@@ -73,8 +99,20 @@ def setup_database(app):
         if not os.path.exists(instance_dir):
             os.makedirs(instance_dir)
 
-        # Создаем таблицы, если они еще не созданы
+        # Если все базы уже размечены текущей версией схемы, пропускаем
+        # create_all и проверку колонок - это ускоряет холодный старт
+        engines = db.engines.values()
+        if all(get_schema_version(engine) == SCHEMA_VERSION for engine in engines):
+            print("Схема базы данных актуальна, создание таблиц пропущено.")
+            return
+
+        # Создаем таблицы (в том числе архивную в instance/archive.db), если они еще не созданы
         db.create_all()
+        # Добавляем колонки мягкого удаления в базы, созданные до их появления
+        add_soft_delete_columns()
+
+        for engine in engines:
+            set_schema_version(engine, SCHEMA_VERSION)
         print("База данных и таблицы успешно созданы.")
 
 
@@ -85,5 +123,12 @@ if __name__ == '__main__':
     # Настраиваем базу данных
     setup_database(app)
 
+    debug = True
+
+    # Фоновая архивация устаревших и удаленных заявок.
+    # В режиме debug запускаем только в дочернем процессе перезагрузчика.
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_archive_scheduler(app)
+
     # Запускаем приложение
-    app.run(debug=True)
+    app.run(debug=debug)
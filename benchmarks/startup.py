@@ -0,0 +1,111 @@
+# benchmarks/startup.py
+# Замер холодного старта воркера: импорт -> create_app -> setup_database -> первый запрос.
+#
+# Запуск из корня проекта:
+#   python benchmarks/startup.py              # время до первого запроса
+#   python benchmarks/startup.py --importtime # самые долгие импорты (python -X importtime)
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Код, который выполняется в отдельном процессе, чтобы каждый замер был "холодным"
+STARTUP_SCRIPT = """
+import json, os, sys, time
+started = time.perf_counter()
+
+from app import create_app, setup_database
+from config import Config
+imported = time.perf_counter()
+
+db_dir = sys.argv[1]
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(db_dir, 'site.db')
+    SQLALCHEMY_BINDS = {'archive': 'sqlite:///' + os.path.join(db_dir, 'archive.db')}
+
+app = create_app(BenchConfig)
+created = time.perf_counter()
+
+setup_database(app)
+database_ready = time.perf_counter()
+
+response = app.test_client().get('/api/tasks')
+first_request = time.perf_counter()
+
+print(json.dumps({
+    "status": response.status_code,
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "setup_database_ms": (database_ready - created) * 1000,
+    "first_request_ms": (first_request - database_ready) * 1000,
+    "total_ms": (first_request - started) * 1000,
+}))
+"""
+
+
+def run_startup(db_dir):
+    """Запускает один холодный старт в отдельном процессе и возвращает замеры."""
+    result = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT, db_dir],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+    # Последняя строка - JSON с замерами (выше могут быть сообщения setup_database)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def print_startup_report(runs):
+    with tempfile.TemporaryDirectory() as db_dir:
+        # Первый запуск создает схему, остальные должны ее пропускать
+        first = run_startup(db_dir)
+        warm = [run_startup(db_dir) for _ in range(runs)]
+
+    keys = ["import_ms", "create_app_ms", "setup_database_ms", "first_request_ms", "total_ms"]
+    print(f"{'этап':<20}{'новая база':>12}{'медиана':>12}{'мин':>10}{'макс':>10}")
+    for key in keys:
+        values = sorted(run[key] for run in warm)
+        median = values[len(values) // 2]
+        print(f"{key:<20}{first[key]:>12.1f}{median:>12.1f}{values[0]:>10.1f}{values[-1]:>10.1f}")
+
+
+def print_importtime_report(top):
+    """Выводит самые долгие импорты по кумулятивному времени (python -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # Формат строки: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+
+    rows.sort(reverse=True)
+    print(f"{'cumulative, ms':>15}{'self, ms':>10}  модуль")
+    for cumulative_us, self_us, module in rows[:top]:
+        print(f"{cumulative_us / 1000:>15.1f}{self_us / 1000:>10.1f}  {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замер холодного старта приложения.')
+    parser.add_argument('--runs', type=int, default=5, help='Количество повторных запусков.')
+    parser.add_argument('--importtime', action='store_true', help='Показать самые долгие импорты.')
+    parser.add_argument('--top', type=int, default=20, help='Сколько импортов показать.')
+    args = parser.parse_args()
+
+    if args.importtime:
+        print_importtime_report(args.top)
+    else:
+        print_startup_report(args.runs)
+
+
+if __name__ == '__main__':
+    main()
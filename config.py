@@ -12,9 +12,32 @@ class Config:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(BASE_DIR, 'instance', 'site.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False  # Рекомендуется для экономии ресурсов
 
+    # Архив устаревших и удаленных заявок хранится в отдельном файле instance/archive.db
+    SQLALCHEMY_BINDS = {
+        'archive': 'sqlite:///' + os.path.join(BASE_DIR, 'instance', 'archive.db')
+    }
+
     # Секретный ключ для сессий и безопасности (нужен для Flask)
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'вы_должны_сгенерировать_сложный_ключ'
 
     # Настройки для Админ-панели (для первой версии без авторизации)
     # Это может быть простой пароль или ключ, который нужно передавать
     ADMIN_KEY = 'master_access_only'
+
+    # Сжатие ответов API (см. src/compression.py)
+    COMPRESS_ENABLED = True
+    COMPRESS_MIMETYPES = ['application/json']
+    COMPRESS_MIN_SIZE = 500  # Ответы меньше порога (в байтах) не сжимаются
+    COMPRESS_LEVEL = 6  # Уровень gzip (1-9)
+    COMPRESS_BR_QUALITY = 4  # Качество brotli (0-11), если пакет brotli установлен
+    COMPRESS_CACHE_SIZE = 64  # Сколько сжатых тел хранить для повторных одинаковых ответов
+
+    # Подбор заданий по уровню игрока (см. src/level_index.py)
+    MIN_PLAYER_LEVEL = 1
+    MAX_PLAYER_LEVEL = 20
+    LEVEL_INDEX_TTL_SECONDS = 300  # Полная перестройка индекса, чтобы учесть изменения других воркеров
+
+    # Архивация (см. src/archive.py)
+    ARCHIVE_CHUNK_SIZE = 500  # Сколько заявок переносится в архив за одну транзакцию
+    ARCHIVE_OUTDATED_AFTER_DAYS = 30  # Заявки 'outdated' архивируются, если дата игры старше N дней
+    ARCHIVE_INTERVAL_SECONDS = 3600  # Период фоновой архивации (0 - отключить)
@@ -0,0 +1,199 @@
+# src/archive.py
+
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, inspect, insert, or_, text
+
+from src.models import db, Task, Application, ArchivedApplication
+from src.level_index import level_index
+
+# Колонки мягкого удаления и индексы, которых нет в базах, созданных до их появления
+SOFT_DELETE_COLUMNS = {
+    'tasks': [
+        ('is_deleted', 'BOOLEAN NOT NULL DEFAULT 0'),
+        ('deleted_at', 'DATETIME'),
+    ],
+    'applications': [
+        ('is_deleted', 'BOOLEAN NOT NULL DEFAULT 0'),
+        ('deleted_at', 'DATETIME'),
+    ],
+}
+SOFT_DELETE_INDEXES = [
+    ('tasks', 'is_deleted'),
+    ('applications', 'is_deleted'),
+    ('applications', 'status'),
+]
+
+
+def add_soft_delete_columns():
+    """
+    Добавляет колонки is_deleted/deleted_at в уже существующие таблицы.
+    db.create_all() создает только отсутствующие таблицы и не меняет существующие.
+    """
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table, columns in SOFT_DELETE_COLUMNS.items():
+            if not inspector.has_table(table):
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            for name, ddl in columns:
+                if name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+
+        for table, column in SOFT_DELETE_INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})"))
+
+
+def _archivable_applications_query(chunk_size, outdated_before):
+    """
+    Удаленные заявки (в том числе заявки удаленных заданий) и устаревшие заявки
+    с датой игры раньше outdated_before. Статус 'outdated' мастер может снять вручную,
+    поэтому свежие устаревшие заявки остаются в основной таблице.
+    """
+    return db.select(Application, Task.name, Task.created_at).join(
+        Task, Task.id == Application.task_id
+    ).filter(
+        or_(
+            Application.is_deleted.is_(True),
+            and_(Application.status == 'outdated', Application.game_date < outdated_before),
+            Task.is_deleted.is_(True),
+        )
+    ).order_by(Application.id).limit(chunk_size)
+
+
+def archive_applications(chunk_size=None):
+    """
+    Переносит устаревшие и удаленные заявки в архивную базу порциями по chunk_size,
+    затем физически удаляет задания, помеченные удаленными и оставшиеся без заявок.
+    Перенос необратим: архивные заявки не возвращаются в основную таблицу.
+
+    Архив и основная база - разные файлы SQLite, поэтому каждая порция сначала
+    сохраняется в архив, и только после этого удаляется из основной таблицы.
+    Если перенос прервался между этими шагами, при повторном запуске уже
+    сохраненные заявки (совпадают source_id и created_at) повторно не вставляются.
+    """
+    if chunk_size is None:
+        chunk_size = current_app.config.get('ARCHIVE_CHUNK_SIZE', 500)
+    outdated_after_days = current_app.config.get('ARCHIVE_OUTDATED_AFTER_DAYS', 30)
+    outdated_before = date.today() - timedelta(days=outdated_after_days)
+
+    archived_count = 0
+    while True:
+        rows = db.session.execute(_archivable_applications_query(chunk_size, outdated_before)).all()
+        if not rows:
+            break
+
+        archived_at = datetime.utcnow()
+        try:
+            # 1. Копируем порцию в архив одним INSERT, пропуская уже перенесенные заявки
+            already_archived = set(db.session.execute(
+                db.select(ArchivedApplication.source_id, ArchivedApplication.created_at).filter(
+                    ArchivedApplication.source_id.in_([application.id for application, _, _ in rows])
+                )
+            ).all())
+
+            archive_rows = [
+                {
+                    "source_id": application.id,
+                    "task_id": application.task_id,
+                    "task_name": task_name,
+                    "task_created_at": task_created_at,
+                    "created_at": application.created_at,
+                    "name": application.name,
+                    "info": application.info,
+                    "game_date": application.game_date,
+                    "time_start": application.time_start,
+                    "time_end": application.time_end,
+                    "status": application.status,
+                    "deleted_at": application.deleted_at,
+                    "archived_at": archived_at
+                }
+                for application, task_name, task_created_at in rows
+                if (application.id, application.created_at) not in already_archived
+            ]
+            if archive_rows:
+                db.session.execute(insert(ArchivedApplication), archive_rows)
+            db.session.commit()
+
+            # 2. Удаляем перенесенные заявки из основной таблицы
+            db.session.execute(
+                db.delete(Application).where(
+                    Application.id.in_([application.id for application, _, _ in rows])
+                )
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        archived_count += len(rows)
+        if len(rows) < chunk_size:
+            break
+
+    # Перенесенные заявки больше не учитываются в количестве заявок заданий
+    if archived_count:
+        level_index.invalidate()
+
+    return {
+        "archived_applications": archived_count,
+        "purged_tasks": purge_deleted_tasks()
+    }
+
+
+def purge_deleted_tasks():
+    """Физически удаляет задания, помеченные удаленными, у которых не осталось заявок."""
+    tasks = db.session.execute(
+        db.select(Task).filter(Task.is_deleted.is_(True), ~Task.applications.any())
+    ).scalars().all()
+
+    if not tasks:
+        return 0
+
+    try:
+        for task in tasks:
+            db.session.delete(task)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return len(tasks)
+
+
+def start_archive_scheduler(app):
+    """
+    Запускает фоновый поток, который раз в ARCHIVE_INTERVAL_SECONDS выполняет архивацию.
+    Возвращает поток или None, если периодическая архивация отключена.
+    """
+    interval = app.config.get('ARCHIVE_INTERVAL_SECONDS')
+    if not interval:
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    result = archive_applications()
+                    print(f"Архивация выполнена: {result}")
+                except Exception as e:
+                    print(f"Ошибка при архивации заявок: {e}")
+
+    thread = threading.Thread(target=run, name='archive-scheduler', daemon=True)
+    thread.start()
+    return thread
+
+
+@click.command('archive')
+@click.option('--chunk-size', type=int, default=None, help='Размер порции переноса.')
+@with_appcontext
+def archive_command(chunk_size):
+    """Переносит устаревшие и удаленные заявки в архив (для запуска по cron)."""
+    result = archive_applications(chunk_size)
+    click.echo(f"Перенесено заявок: {result['archived_applications']}, "
+               f"удалено заданий: {result['purged_tasks']}")
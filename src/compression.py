@@ -0,0 +1,227 @@
+# src/compression.py
+
+import gzip
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from flask import current_app, request
+
+try:
+    # Brotli - опциональная зависимость. Без нее остается только gzip.
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class Compression:
+    """
+    Сжатие ответов API (gzip / brotli) в зависимости от заголовка Accept-Encoding.
+    Инициализируется так же, как db: объект создается на уровне модуля,
+    а в create_app вызывается compression.init_app(app).
+    """
+
+    def __init__(self, app=None):
+        # Кэш уже сжатых тел: (кодировка, sha1 тела) -> сжатые байты
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = self._empty_stats()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Регистрирует настройки по умолчанию и обработчик after_request."""
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIMETYPES', ['application/json'])
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)  # Порог в байтах
+        app.config.setdefault('COMPRESS_LEVEL', 6)  # Уровень gzip (1-9)
+        app.config.setdefault('COMPRESS_BR_QUALITY', 4)  # Качество brotli (0-11)
+        app.config.setdefault('COMPRESS_CACHE_SIZE', 64)  # Количество сжатых тел в кэше
+
+        app.extensions['compression'] = self
+        app.after_request(self.after_request)
+
+    # --- Выбор кодировки ---
+
+    def _choose_encoding(self):
+        """Выбирает лучшую поддерживаемую кодировку из Accept-Encoding клиента."""
+        supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+        return request.accept_encodings.best_match(supported)
+
+    @staticmethod
+    def _should_compress(response):
+        config = current_app.config
+        if not config.get('COMPRESS_ENABLED'):
+            return False
+        if response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return False
+        if response.status_code < 200 or response.status_code >= 300 or response.status_code in (204, 206):
+            return False
+        if 'Content-Encoding' in response.headers:
+            return False
+        return True
+
+    # --- Сжатие ---
+
+    @staticmethod
+    def _compress(data, encoding):
+        config = current_app.config
+        if encoding == 'br':
+            return brotli.compress(data, quality=config['COMPRESS_BR_QUALITY'])
+        return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'])
+
+    def _compress_cached(self, data, encoding):
+        """
+        Сжимает тело ответа, переиспользуя результат для одинаковых тел.
+        Возвращает (сжатые байты, было ли попадание в кэш).
+        """
+        cache_size = current_app.config['COMPRESS_CACHE_SIZE']
+        key = (encoding, hashlib.sha1(data).digest())
+
+        if cache_size:
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    return cached, True
+
+        compressed = self._compress(data, encoding)
+
+        if cache_size:
+            with self._lock:
+                self._cache[key] = compressed
+                while len(self._cache) > cache_size:
+                    self._cache.popitem(last=False)
+
+        return compressed, False
+
+    @staticmethod
+    def _stream_compressor(encoding):
+        """
+        Создает потоковый компрессор. Вызывается в контексте запроса: сам поток
+        отдается уже после его завершения, когда current_app недоступен.
+        """
+        config = current_app.config
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=config['COMPRESS_BR_QUALITY'])
+            return compressor.process, compressor.finish
+        # wbits=31 - формат gzip (заголовок + CRC)
+        compressor = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)
+        return compressor.compress, compressor.flush
+
+    def _stream(self, iterable, encoding, compress_chunk, flush):
+        """Сжимает потоковый ответ по частям, не собирая его целиком в памяти."""
+        bytes_in = bytes_out = 0
+        cpu_time = 0.0
+        try:
+            for chunk in iterable:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                started = time.thread_time()
+                out = compress_chunk(chunk)
+                cpu_time += time.thread_time() - started
+                bytes_in += len(chunk)
+                bytes_out += len(out)
+                if out:
+                    yield out
+
+            started = time.thread_time()
+            out = flush()
+            cpu_time += time.thread_time() - started
+            bytes_out += len(out)
+            if out:
+                yield out
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+            self._record(encoding, bytes_in, bytes_out, cpu_time, streamed=True)
+
+    # --- Обработчик ответа ---
+
+    def after_request(self, response):
+        if not self._should_compress(response):
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        encoding = self._choose_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            compress_chunk, flush = self._stream_compressor(encoding)
+            response.response = self._stream(response.response, encoding, compress_chunk, flush)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        data = response.get_data()
+        if len(data) < current_app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        started = time.thread_time()
+        compressed, cache_hit = self._compress_cached(data, encoding)
+        cpu_time = time.thread_time() - started
+
+        # Сжатие не дало выигрыша - отдаем как есть
+        if len(compressed) >= len(data):
+            return response
+
+        self._record(encoding, len(data), len(compressed), cpu_time, cache_hit=cache_hit)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    # --- Статистика (затраты CPU против сэкономленных байт) ---
+    # CPU считается через time.thread_time(): время только текущего потока,
+    # чтобы параллельные запросы многопоточного сервера не искажали замер.
+
+    @staticmethod
+    def _empty_stats():
+        return {
+            "responses": 0,
+            "streamed_responses": 0,
+            "cache_hits": 0,
+            "bytes_in": 0,
+            "bytes_out": 0,
+            "cpu_seconds": 0.0,
+            "by_encoding": {},
+        }
+
+    def _record(self, encoding, bytes_in, bytes_out, cpu_time, streamed=False, cache_hit=False):
+        with self._lock:
+            stats = self._stats
+            stats["responses"] += 1
+            stats["streamed_responses"] += int(streamed)
+            stats["cache_hits"] += int(cache_hit)
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            stats["cpu_seconds"] += cpu_time
+            stats["by_encoding"][encoding] = stats["by_encoding"].get(encoding, 0) + 1
+
+    def get_stats(self):
+        """Возвращает сводку: сколько байт сэкономлено и сколько CPU на это потрачено."""
+        with self._lock:
+            stats = dict(self._stats, by_encoding=dict(self._stats["by_encoding"]))
+            stats["cache_entries"] = len(self._cache)
+
+        bytes_saved = stats["bytes_in"] - stats["bytes_out"]
+        cpu_ms = stats["cpu_seconds"] * 1000
+        stats["bytes_saved"] = bytes_saved
+        stats["compression_ratio"] = round(stats["bytes_out"] / stats["bytes_in"], 4) if stats["bytes_in"] else None
+        # Сколько килобайт экономит одна миллисекунда процессорного времени
+        stats["kb_saved_per_cpu_ms"] = round(bytes_saved / 1024 / cpu_ms, 2) if cpu_ms else None
+        stats["cpu_seconds"] = round(stats["cpu_seconds"], 6)
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = self._empty_stats()
+
+
+# Объект сжатия (инициализируется в app.py)
+compression = Compression()
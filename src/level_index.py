@@ -0,0 +1,273 @@
+# src/level_index.py
+
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import func
+
+from src.models import db, Task, Application
+
+
+class _LevelIndexState:
+    """
+    Индекс "уровень игрока -> задания" одного приложения, построенный заранее.
+    Для каждого уровня хранится список id подходящих заданий, отсортированный
+    по убыванию количества заявок, поэтому запрос /api/tasks/for-level/<lvl>
+    сводится к поиску в словаре.
+
+    Индекс живет в памяти процесса и обновляется инкрементально при создании/удалении
+    заданий и заявок. Изменения, сделанные другими воркерами, подхватываются
+    полной перестройкой раз в LEVEL_INDEX_TTL_SECONDS.
+
+    Перестройку выполняет только один поток, остальные в это время работают со старым
+    индексом. Изменения, пришедшие во время перестройки, записываются в _pending
+    и повторно применяются к новому индексу после его подмены.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()  # Перестраивать индекс может только один поток
+        self._buckets = {}  # уровень -> [id задания, ...]
+        self._ranges = {}  # id задания -> (первый уровень, последний уровень)
+        self._counts = {}  # id задания -> количество заявок
+        self._unsorted = set()  # уровни, порядок в которых нужно пересчитать
+        self._built_at = None
+        self._stale = False  # индекс устарел (например, после архивации) и будет перестроен
+        self._pending = None  # изменения, пришедшие во время перестройки (None - перестройка не идет)
+
+    # --- Построение индекса ---
+
+    @staticmethod
+    def _level_range(min_lvl, max_lvl):
+        """
+        Переводит уровни задания в диапазон уровней игрока.
+        Пустая граница (NULL) означает открытый диапазон до минимального/максимального уровня.
+        Некорректная граница (например, текст "3-5" в старых базах) тоже считается открытой,
+        чтобы одна испорченная строка не ломала весь индекс.
+        """
+        first = current_app.config['MIN_PLAYER_LEVEL']
+        last = current_app.config['MAX_PLAYER_LEVEL']
+        try:
+            if min_lvl is not None:
+                first = max(first, int(min_lvl))
+        except (TypeError, ValueError):
+            pass
+        try:
+            if max_lvl is not None:
+                last = min(last, int(max_lvl))
+        except (TypeError, ValueError):
+            pass
+        return first, last
+
+    def _sort_key(self, task_id):
+        return -self._counts.get(task_id, 0), task_id
+
+    @staticmethod
+    def _query_counts(task_ids=None):
+        """Количество неудаленных заявок по заданиям (всем или только task_ids)."""
+        q = db.select(Application.task_id, func.count(Application.id)).filter(
+            Application.is_deleted.is_(False)
+        )
+        if task_ids is not None:
+            q = q.filter(Application.task_id.in_(task_ids))
+        return dict(db.session.execute(q.group_by(Application.task_id)).all())
+
+    def rebuild(self):
+        """Полностью перестраивает индекс по базе (ждет, если перестройка уже идет)."""
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Перестройка индекса. Вызывается только под _rebuild_lock."""
+        with self._lock:
+            self._pending = []
+            self._stale = False  # invalidate() во время перестройки снова выставит флаг
+
+        try:
+            tasks = db.session.execute(
+                db.select(Task.id, Task.min_lvl, Task.max_lvl).filter(Task.is_deleted.is_(False))
+            ).all()
+            counts = self._query_counts()
+        except Exception:
+            with self._lock:
+                self._pending = None
+                self._stale = True
+            raise
+
+        ranges = {task_id: self._level_range(min_lvl, max_lvl) for task_id, min_lvl, max_lvl in tasks}
+
+        buckets = {}
+        for task_id, (first, last) in ranges.items():
+            for level in range(first, last + 1):
+                buckets.setdefault(level, []).append(task_id)
+        for task_ids in buckets.values():
+            task_ids.sort(key=lambda task_id: (-counts.get(task_id, 0), task_id))
+
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._counts = counts
+            self._ranges = ranges
+            self._buckets = buckets
+            self._unsorted = set()
+            self._built_at = time.monotonic()
+
+            # Повторяем изменения, пришедшие во время перестройки. Добавление и удаление
+            # заданий идемпотентны, а количество заявок пересчитывается запросом ниже:
+            # по дельте нельзя понять, успели ли запросы выше увидеть эту заявку.
+            recount = set()
+            for operation, task_id, *args in pending:
+                if operation == 'add':
+                    self._apply_add(task_id, *args)
+                elif operation == 'remove':
+                    self._apply_remove(task_id)
+                else:
+                    recount.add(task_id)
+
+        if recount:
+            fresh_counts = self._query_counts(list(recount))
+            with self._lock:
+                for task_id in recount:
+                    if task_id in self._ranges:
+                        self._counts[task_id] = fresh_counts.get(task_id, 0)
+                        first, last = self._ranges[task_id]
+                        self._unsorted.update(range(first, last + 1))
+
+    def invalidate(self):
+        """Помечает индекс устаревшим: он будет перестроен при следующем запросе."""
+        with self._lock:
+            self._stale = True
+
+    def _needs_rebuild(self):
+        ttl = current_app.config['LEVEL_INDEX_TTL_SECONDS']
+        return self._stale or bool(ttl and time.monotonic() - self._built_at > ttl)
+
+    def _ensure_built(self):
+        # Индекса еще нет - отдавать нечего, ждем построения
+        if self._built_at is None:
+            with self._rebuild_lock:
+                if self._built_at is None:
+                    self._rebuild()
+            return
+
+        if not self._needs_rebuild():
+            return
+
+        # Индекс устарел: перестраивает один поток, остальные отдают старый индекс
+        if self._rebuild_lock.acquire(blocking=False):
+            try:
+                if self._needs_rebuild():
+                    self._rebuild()
+            finally:
+                self._rebuild_lock.release()
+
+    # --- Инкрементальные обновления ---
+    # Методы _apply_* вызываются под self._lock
+
+    def _apply_add(self, task_id, first, last):
+        if task_id in self._ranges:
+            return
+        self._ranges[task_id] = (first, last)
+        self._counts.setdefault(task_id, 0)
+        for level in range(first, last + 1):
+            self._buckets.setdefault(level, []).append(task_id)
+            self._unsorted.add(level)
+
+    def _apply_remove(self, task_id):
+        first, last = self._ranges.pop(task_id, (0, -1))
+        self._counts.pop(task_id, None)
+        for level in range(first, last + 1):
+            bucket = self._buckets.get(level)
+            if bucket and task_id in bucket:
+                bucket.remove(task_id)
+
+    def _apply_count(self, task_id, delta):
+        if task_id not in self._ranges:
+            return
+        self._counts[task_id] = max(self._counts.get(task_id, 0) + delta, 0)
+        first, last = self._ranges[task_id]
+        self._unsorted.update(range(first, last + 1))
+
+    def add_task(self, task):
+        """Добавляет новое задание в корзины его уровней."""
+        first, last = self._level_range(task.min_lvl, task.max_lvl)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(('add', task.id, first, last))
+            if self._built_at is not None:
+                self._apply_add(task.id, first, last)
+
+    def remove_task(self, task_id):
+        """Убирает задание из всех корзин."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(('remove', task_id))
+            if self._built_at is not None:
+                self._apply_remove(task_id)
+
+    def change_application_count(self, task_id, delta):
+        """Обновляет количество заявок задания; порядок в его корзинах пересчитывается лениво."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(('count', task_id))
+            if self._built_at is not None:
+                self._apply_count(task_id, delta)
+
+    # --- Поиск ---
+
+    def get_tasks_for_level(self, level):
+        """
+        Возвращает список пар (id задания, количество заявок) для уровня игрока,
+        отсортированный по убыванию количества заявок.
+        """
+        self._ensure_built()
+        with self._lock:
+            bucket = self._buckets.get(level, [])
+            if level in self._unsorted:
+                bucket.sort(key=self._sort_key)
+                self._unsorted.discard(level)
+            return [(task_id, self._counts.get(task_id, 0)) for task_id in bucket]
+
+
+class LevelIndex:
+    """
+    Расширение Flask для индекса заданий по уровням.
+    Как и db, объект создается на уровне модуля, а состояние индекса хранится
+    отдельно для каждого приложения в app.extensions['level_index'].
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('MIN_PLAYER_LEVEL', 1)
+        app.config.setdefault('MAX_PLAYER_LEVEL', 20)
+        app.config.setdefault('LEVEL_INDEX_TTL_SECONDS', 300)  # 0 - не перестраивать по времени
+        app.extensions['level_index'] = _LevelIndexState()
+
+    @staticmethod
+    def _state():
+        return current_app.extensions['level_index']
+
+    def rebuild(self):
+        self._state().rebuild()
+
+    def invalidate(self):
+        self._state().invalidate()
+
+    def add_task(self, task):
+        self._state().add_task(task)
+
+    def remove_task(self, task_id):
+        self._state().remove_task(task_id)
+
+    def change_application_count(self, task_id, delta):
+        self._state().change_application_count(task_id, delta)
+
+    def get_tasks_for_level(self, level):
+        return self._state().get_tasks_for_level(level)
+
+
+# Индекс заданий по уровням (инициализируется в app.py)
+level_index = LevelIndex()
@@ -6,6 +6,10 @@ from datetime import datetime, timedelta
 # Инициализация SQLAlchemy (объект db должен быть инициализирован в app.py)
 db = SQLAlchemy()
 
+# Версия схемы базы данных. Увеличивайте при любом изменении моделей:
+# setup_database пропускает создание таблиц, если версия в базе уже совпадает.
+SCHEMA_VERSION = 3
+
 
 # Вспомогательная функция для обработки тэгов (массива строк в SQLite)
 # В SQLite нет встроенной поддержки массивов, поэтому мы будем хранить их как JSON/текст.
@@ -36,6 +40,11 @@ class Task(db.Model):
     # Дополнительная обработка для string[] будет в бизнес-логике.
     tags = db.Column(db.String(255), nullable=True)  # Тэги для задания
 
+    # Мягкое удаление. Удаленные задания скрываются из выдачи,
+    # а физически удаляются фоновой архивацией (см. src/archive.py)
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    deleted_at = db.Column(db.DateTime, nullable=True)
+
     # Связь с заявками
     applications = db.relationship('Application', backref='task', lazy=True, cascade="all, delete-orphan")
 
@@ -64,7 +73,12 @@ class Application(db.Model):
     # Статус заявки. Используем строковый enum.
     # Допустимые статусы: "outdated", "confirmed", "default"
     status_choices = ['default', 'confirmed', 'outdated']
-    status = db.Column(db.String(20), default='default', nullable=False)
+    status = db.Column(db.String(20), default='default', nullable=False, index=True)
+
+    # Мягкое удаление. Удаленные и устаревшие заявки переносятся архивацией
+    # в таблицу ArchivedApplication (отдельный файл archive.db)
+    is_deleted = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    deleted_at = db.Column(db.DateTime, nullable=True)
 
     # Мы добавим логику автозаполнения time_end во Flask-роуте, но на уровне БД
     # модель готова хранить эти данные.
@@ -81,3 +95,40 @@ class Window(db.Model):
     game_date = db.Column(db.Date, nullable=False)  # Дата указанная пользователем
     time_start = db.Column(db.Time, nullable=True)  # Время начала "окна"
     time_end = db.Column(db.Time, nullable=True)  # Время конца "окна"
+
+
+class ArchivedApplication(db.Model):
+    """
+    Архивная копия Заявки (устаревшей или удаленной)
+    Хранится в отдельной базе (bind 'archive'), чтобы основная таблица applications
+    содержала только актуальные заявки.
+    Структура: id, source_id, поля Application + task_name, task_created_at, deleted_at, archived_at
+
+    SQLite переиспользует id удаленных строк, поэтому id исходной заявки (source_id)
+    и id задания (task_id) не уникальны во времени. Запись однозначно определяют
+    пары (source_id, created_at) и (task_id, task_created_at).
+    """
+    __bind_key__ = 'archive'
+    __tablename__ = 'applications_archive'
+    __table_args__ = (
+        # Защита от повторного переноса одной и той же заявки
+        db.UniqueConstraint('source_id', 'created_at', name='uq_applications_archive_source'),
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)  # Собственный идентификатор архивной записи
+    source_id = db.Column(db.Integer, nullable=False, index=True)  # ID исходной заявки
+    task_id = db.Column(db.Integer, nullable=False, index=True)  # ID задания (без внешнего ключа - другая база)
+    task_name = db.Column(db.String(100), nullable=True)  # Имя задания на момент архивации
+    task_created_at = db.Column(db.DateTime, nullable=True)  # Время создания задания (отличает задания с одним id)
+
+    created_at = db.Column(db.DateTime, nullable=False)  # Время создания заявки
+    name = db.Column(db.String(100), nullable=False)  # Имя инициатора заявки
+    info = db.Column(db.Text, nullable=True)  # Комментарий оставленный пользователем
+    game_date = db.Column(db.Date, nullable=False)  # Дата указанная пользователем
+    time_start = db.Column(db.Time, nullable=True)  # Время начала "окна"
+    time_end = db.Column(db.Time, nullable=True)  # Время конца "окна"
+    status = db.Column(db.String(20), nullable=False)  # Статус на момент архивации
+
+    deleted_at = db.Column(db.DateTime, nullable=True)  # Время мягкого удаления (если было)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Время переноса в архив
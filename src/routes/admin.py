@@ -2,7 +2,13 @@
 
 from flask import Blueprint, jsonify, request, abort
 from config import Config
-from src.models import db, Task, Application, Window
+from src.models import db, Task, Application, Window, ArchivedApplication
+from src.compression import compression
+from src.archive import archive_applications
+from src.level_index import level_index
+from src.utils import (
+    parse_time_string, parse_date_string, task_to_detailed_json, application_to_json, window_to_json
+)
 from sqlalchemy import func, desc
 from datetime import datetime
 
@@ -11,44 +17,23 @@ admin_bp = Blueprint('admin', __name__)
 
 # --- Вспомогательные функции ---
 
-def task_to_detailed_json(task):
-    """Преобразует объект Task в детальный формат для ответа."""
-    tags_list = task.tags.split(',') if task.tags else []
-
-    return {
-        "id": task.id,
-        "name": task.name,
-        "short_description": task.short_description,
-        "description": task.description,
-        "min_lvl": task.min_lvl,
-        "max_lvl": task.max_lvl,
-        "tags": tags_list,
-        "created_at": task.created_at.isoformat() + 'Z'
-    }
-
-
-def application_to_json_admin(application):
-    """Преобразует объект Application в JSON формат ответа для админ-панели."""
+def archived_application_to_json(application):
+    """Преобразует объект ArchivedApplication в JSON формат ответа для админ-панели."""
     return {
         "id": application.id,
+        "source_id": application.source_id,
         "task_id": application.task_id,
+        "task_name": application.task_name,
+        "task_created_at": application.task_created_at.isoformat() + 'Z' if application.task_created_at else None,
         "created_at": application.created_at.isoformat() + 'Z',
         "name": application.name,
         "info": application.info,
         "game_date": application.game_date.isoformat(),
         "time_start": application.time_start.isoformat() if application.time_start else None,
         "time_end": application.time_end.isoformat() if application.time_end else None,
-        "status": application.status
-    }
-
-
-def window_to_json(window):
-    """Преобразует объект Window в JSON формат ответа."""
-    return {
-        "id": window.id,
-        "game_date": window.game_date.isoformat(),
-        "time_start": window.time_start.isoformat() if window.time_start else None,
-        "time_end": window.time_end.isoformat() if window.time_end else None,
+        "status": application.status,
+        "deleted_at": application.deleted_at.isoformat() + 'Z' if application.deleted_at else None,
+        "archived_at": application.archived_at.isoformat() + 'Z'
     }
 
 
@@ -89,6 +74,12 @@ def create_task():
         if field not in data:
             abort(400, description=f"Validation failed: Field '{field}' is required.")
 
+    # Уровни: целое число или null (открытая граница)
+    for field in ('min_lvl', 'max_lvl'):
+        value = data.get(field)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool)):
+            abort(400, description=f"Validation failed: Field '{field}' must be an integer or null.")
+
     tags_data = data.get('tags', [])
     tags_string = ','.join(tags_data) if isinstance(tags_data, list) else ''
 
@@ -108,6 +99,8 @@ def create_task():
         db.session.rollback()
         abort(500, description=f"Internal server error: Could not save task. Details: {str(e)}")
 
+    level_index.add_task(new_task)
+
     return jsonify(task_to_detailed_json(new_task)), 201
 
 
@@ -116,20 +109,32 @@ def create_task():
 @master_required
 def delete_task(task_id):
     """
-    Удалить задание.
+    Удалить задание (мягкое удаление).
+    Задание и его заявки помечаются удаленными, а в архив и из базы
+    их переносит фоновая архивация (src/archive.py).
     """
     task_to_delete = db.session.get(Task, task_id)
 
-    if task_to_delete is None:
+    if task_to_delete is None or task_to_delete.is_deleted:
         abort(404, description="Task not found")
 
     try:
-        db.session.delete(task_to_delete)
+        deleted_at = datetime.utcnow()
+        task_to_delete.is_deleted = True
+        task_to_delete.deleted_at = deleted_at
+        db.session.execute(
+            db.update(Application).where(
+                Application.task_id == task_id,
+                Application.is_deleted.is_(False)
+            ).values(is_deleted=True, deleted_at=deleted_at)
+        )
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         abort(500, description=f"Internal server error: Could not delete task. Details: {str(e)}")
 
+    level_index.remove_task(task_id)
+
     return '', 204
 
 
@@ -142,13 +147,13 @@ def get_dashboard_data():
     """
 
     # 1. Общее количество активных заданий
-    total_active_tasks = db.session.query(Task).count()
+    total_active_tasks = db.session.query(Task).filter(Task.is_deleted.is_(False)).count()
 
     # 2. Количество заявок по статусам
     applications_by_status_raw = db.session.query(
         Application.status,
         func.count(Application.id)
-    ).group_by(Application.status).all()
+    ).filter(Application.is_deleted.is_(False)).group_by(Application.status).all()
 
     # Преобразуем в словарь и обеспечим наличие всех статусов (default, confirmed, outdated)
     applications_by_status_dict = dict(applications_by_status_raw)
@@ -159,7 +164,10 @@ def get_dashboard_data():
     top_tasks_raw = db.session.query(
         Task.name,
         func.count(Application.id).label('app_count')
-    ).join(Application, Task.id == Application.task_id).group_by(Task.name).order_by(
+    ).join(Application, Task.id == Application.task_id).filter(
+        Task.is_deleted.is_(False),
+        Application.is_deleted.is_(False)
+    ).group_by(Task.name).order_by(
         desc('app_count')
     ).limit(5).all()
 
@@ -171,7 +179,7 @@ def get_dashboard_data():
     top_dates_raw = db.session.query(
         Application.game_date,
         func.count(Application.id).label('date_count')
-    ).group_by(Application.game_date).order_by(
+    ).filter(Application.is_deleted.is_(False)).group_by(Application.game_date).order_by(
         desc('date_count')
     ).limit(5).all()
 
@@ -193,10 +201,12 @@ def get_dashboard_data():
 @master_required
 def list_applications():
     applications = db.session.execute(
-        db.select(Application).order_by(desc(Application.game_date), desc(Application.time_start))
+        db.select(Application).filter(
+            Application.is_deleted.is_(False)
+        ).order_by(desc(Application.game_date), desc(Application.time_start))
     ).scalars().all()
 
-    applications_json = [application_to_json_admin(app) for app in applications]
+    applications_json = [application_to_json(app) for app in applications]
     return jsonify(applications_json), 200
 
 
@@ -218,7 +228,8 @@ def list_application_dates():
         q = db.select(
             db.distinct(Application.game_date)
         ).filter(
-            Application.status != 'outdated'
+            Application.status != 'outdated',
+            Application.is_deleted.is_(False)
         ).order_by(Application.game_date)
 
         # 2. Выполнение запроса и получение списка объектов datetime.date
@@ -239,6 +250,48 @@ def list_application_dates():
         return jsonify({"message": "Внутренняя ошибка сервера"}), 500
 
 
+## 4.2 GET /api/admin/applications/archive: Получить архивные заявки
+@admin_bp.route('/applications/archive', methods=['GET'])
+@master_required
+def list_archived_applications():
+    """
+    Список заявок из архива (устаревшие и удаленные), от последних перенесенных.
+    Архив растет неограниченно, поэтому отдается постранично: ?limit=&offset=
+    (limit по умолчанию 100, максимум 500).
+    """
+    limit = request.args.get('limit', 100, type=int)
+    offset = request.args.get('offset', 0, type=int)
+
+    if limit < 1 or limit > 500 or offset < 0:
+        abort(400, description="Validation failed: 'limit' must be between 1 and 500, 'offset' must be non-negative.")
+
+    # Сортировка по первичному ключу не требует сортировки всего архива
+    applications = db.session.execute(
+        db.select(ArchivedApplication).order_by(
+            desc(ArchivedApplication.id)
+        ).limit(limit).offset(offset)
+    ).scalars().all()
+
+    applications_json = [archived_application_to_json(app) for app in applications]
+    return jsonify(applications_json), 200
+
+
+## 4.3 POST /api/admin/archive: Запустить архивацию вручную
+@admin_bp.route('/archive', methods=['POST'])
+@master_required
+def run_archive():
+    """
+    Переносит устаревшие и удаленные заявки в архив, не дожидаясь фоновой архивации.
+    Перенос необратим: архивные заявки нельзя изменить или вернуть.
+    """
+    try:
+        result = archive_applications()
+    except Exception as e:
+        abort(500, description=f"Internal server error: Could not archive applications. Details: {str(e)}")
+
+    return jsonify(result), 200
+
+
 ## 5. PUT /api/admin/applications/<int:app_id>: Обновить статус заявки
 @admin_bp.route('/applications/<int:app_id>', methods=['PUT'])
 @master_required
@@ -252,7 +305,7 @@ def update_application_status(app_id):
 
     application = db.session.get(Application, app_id)
 
-    if application is None:
+    if application is None or application.is_deleted:
         abort(404, description="Application not found")
 
     try:
@@ -262,27 +315,30 @@ def update_application_status(app_id):
         db.session.rollback()
         abort(500, description=f"Internal server error: Could not update application status. Details: {str(e)}")
 
-    return jsonify(application_to_json_admin(application)), 200
+    return jsonify(application_to_json(application)), 200
 
 
 ## 6. DELETE /api/admin/applications/<int:app_id>: Удалить заявку (НОВОЕ)
 @admin_bp.route('/applications/<int:app_id>', methods=['DELETE'])
 @master_required
 def delete_application(app_id):
-    """Удаляет заявку по ID."""
+    """Удаляет заявку по ID (мягкое удаление, в архив ее переносит фоновая архивация)."""
     application = db.session.get(Application, app_id)
 
-    if application is None:
+    if application is None or application.is_deleted:
         # Если заявка не найдена, возвращаем 404
         abort(404, description="Application not found")
 
     try:
-        db.session.delete(application)
+        application.is_deleted = True
+        application.deleted_at = datetime.utcnow()
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         abort(500, description=f"Internal server error: Could not delete application. Details: {str(e)}")
 
+    level_index.change_application_count(application.task_id, -1)
+
     # Успешное удаление возвращает 204 No Content
     return '', 204
 
@@ -299,9 +355,6 @@ def create_window():
         if field not in data:
             abort(400, description=f"Validation failed: Field '{field}' is required.")
 
-    # Используем парсеры, которые есть в public.py (в идеале они должны быть в утилитах)
-    from src.routes.public import parse_date_string, parse_time_string  # Временный импорт для использования
-
     game_date_obj = parse_date_string(data['game_date'])
     time_start_obj = parse_time_string(data['time_start'])
     time_end_obj = parse_time_string(data['time_end'])
@@ -342,3 +395,13 @@ def delete_window(window_id):
         abort(500, description=f"Internal server error: Could not delete window. Details: {str(e)}")
 
     return '', 204
+
+
+## 8. GET /api/admin/compression: Статистика сжатия ответов
+@admin_bp.route('/compression', methods=['GET'])
+@master_required
+def get_compression_stats():
+    """
+    Возвращает затраты CPU на сжатие ответов и количество сэкономленных байт.
+    """
+    return jsonify(compression.get_stats()), 200
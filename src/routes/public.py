@@ -1,48 +1,32 @@
 # src/routes/public.py
 
-from flask import Blueprint, jsonify, request, abort
+from flask import Blueprint, jsonify, request, abort, current_app
 from sqlalchemy import func
 from src.models import db, Task, Application, Window
-from datetime import datetime, date, time, timedelta
+from src.level_index import level_index
+from src.utils import (
+    parse_time_string, parse_date_string, task_to_detailed_json, application_to_json, window_to_json
+)
+from datetime import datetime, date, timedelta
 
 public_bp = Blueprint('public', __name__)
 
 
-# --- Вспомогательные функции для парсинга и форматирования ---
+# --- Вспомогательные функции для форматирования ---
 
-def parse_time_string(time_str):
-    """Парсит строку времени (HH:MM или HH:MM:SS) в объект datetime.time."""
-    if not time_str:
-        return None
-    try:
-        t = datetime.strptime(time_str, '%H:%M:%S').time()
-    except ValueError:
-        try:
-            t = datetime.strptime(time_str, '%H:%M').time()
-        except ValueError:
-            return None
-    return t
-
-
-def parse_date_string(date_str):
-    """Парсит строку даты (YYYY-MM-DD) в объект datetime.date."""
-    if not date_str:
-        return None
-    try:
-        d = datetime.strptime(date_str, '%Y-%m-%d').date()
-    except ValueError:
-        return None
-    return d
-
-
-def task_to_short_json(task):
-    """Преобразует объект Task в краткий формат для списка заданий."""
+def task_to_short_json(task, application_count=None):
+    """
+    Преобразует объект Task в краткий формат для списка заданий.
+    Если количество заявок уже известно (например, из индекса уровней), запрос к базе не выполняется.
+    """
     tags_list = task.tags.split(',') if task.tags else []
 
     # Подсчет количества заявок
-    application_count = db.session.query(func.count(Application.id)).filter(
-        Application.task_id == task.id
-    ).scalar()
+    if application_count is None:
+        application_count = db.session.query(func.count(Application.id)).filter(
+            Application.task_id == task.id,
+            Application.is_deleted.is_(False)
+        ).scalar()
 
     return {
         "id": task.id,
@@ -55,53 +39,12 @@ def task_to_short_json(task):
     }
 
 
-def task_to_detailed_json(task):
-    """Преобразует объект Task в детальный формат."""
-    tags_list = task.tags.split(',') if task.tags else []
-
-    return {
-        "id": task.id,
-        "name": task.name,
-        "short_description": task.short_description,
-        "description": task.description,
-        "min_lvl": task.min_lvl,
-        "max_lvl": task.max_lvl,
-        "tags": tags_list,
-        "created_at": task.created_at.isoformat() + 'Z'
-    }
-
-
-def application_to_json(application):
-    """Преобразует объект Application в JSON формат ответа."""
-    return {
-        "id": application.id,
-        "task_id": application.task_id,
-        "created_at": application.created_at.isoformat() + 'Z',
-        "name": application.name,
-        "info": application.info,
-        "game_date": application.game_date.isoformat(),
-        "time_start": application.time_start.isoformat() if application.time_start else None,
-        "time_end": application.time_end.isoformat() if application.time_end else None,
-        "status": application.status
-    }
-
-
-def window_to_json(window):
-    """Преобразует объект Window в JSON формат ответа."""
-    return {
-        "id": window.id,
-        "game_date": window.game_date.isoformat(),
-        "time_start": window.time_start.isoformat() if window.time_start else None,
-        "time_end": window.time_end.isoformat() if window.time_end else None,
-    }
-
-
 # --- ЭНДПОИНТЫ (Blueprints) ---
 
 ## 1. GET /api/tasks: Получить список всех активных заданий
 @public_bp.route('/tasks', methods=['GET'])
 def list_tasks():
-    tasks = Task.query.all()
+    tasks = Task.query.filter(Task.is_deleted.is_(False)).all()
     tasks_json = [task_to_short_json(task) for task in tasks]
     return jsonify(tasks_json), 200
 
@@ -110,11 +53,41 @@ def list_tasks():
 @public_bp.route('/tasks/<int:task_id>', methods=['GET'])
 def get_task_details(task_id):
     task = db.session.get(Task, task_id)
-    if task is None:
+    if task is None or task.is_deleted:
         abort(404, description="Task not found")
     return jsonify(task_to_detailed_json(task)), 200
 
 
+## 2.1 GET /api/tasks/for-level/<lvl>: Задания, подходящие для уровня игрока
+@public_bp.route('/tasks/for-level/<int:lvl>', methods=['GET'])
+def list_tasks_for_level(lvl):
+    """
+    Возвращает задания, в диапазон уровней которых входит lvl, по убыванию количества заявок.
+    Список id берется из заранее построенного индекса (src/level_index.py).
+    """
+    min_level = current_app.config['MIN_PLAYER_LEVEL']
+    max_level = current_app.config['MAX_PLAYER_LEVEL']
+    if lvl < min_level or lvl > max_level:
+        abort(400, description=f"Validation failed: Level must be between {min_level} and {max_level}.")
+
+    ranked = level_index.get_tasks_for_level(lvl)
+    if not ranked:
+        return jsonify([]), 200
+
+    # Загружаем задания по первичному ключу одним запросом
+    tasks = db.session.execute(
+        db.select(Task).filter(Task.id.in_([task_id for task_id, _ in ranked]))
+    ).scalars().all()
+    tasks_by_id = {task.id: task for task in tasks}
+
+    tasks_json = [
+        task_to_short_json(tasks_by_id[task_id], application_count=count)
+        for task_id, count in ranked
+        if task_id in tasks_by_id and not tasks_by_id[task_id].is_deleted
+    ]
+    return jsonify(tasks_json), 200
+
+
 ## 3. POST /api/applications: Создать новую заявку на участие в игре
 @public_bp.route('/applications', methods=['POST'])
 def create_application():
@@ -131,7 +104,8 @@ def create_application():
 
     # Проверка существования Задания
     task_id = data['task_id']
-    if not db.session.get(Task, task_id):
+    task = db.session.get(Task, task_id)
+    if task is None or task.is_deleted:
         abort(404, description="Task not found")
 
     # Парсинг даты и времени
@@ -176,6 +150,8 @@ def create_application():
         db.session.rollback()
         abort(500, description=f"Internal server error: Could not save application. Details: {str(e)}")
 
+    level_index.change_application_count(task_id, 1)
+
     # Ответ: 201 Created
     return jsonify(application_to_json(new_application)), 201
 
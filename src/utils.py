@@ -0,0 +1,74 @@
+# src/utils.py
+# Общие вспомогательные функции для публичных и админских маршрутов
+
+from datetime import datetime
+
+
+# --- Парсинг даты и времени ---
+
+def parse_time_string(time_str):
+    """Парсит строку времени (HH:MM или HH:MM:SS) в объект datetime.time."""
+    if not time_str:
+        return None
+    try:
+        t = datetime.strptime(time_str, '%H:%M:%S').time()
+    except ValueError:
+        try:
+            t = datetime.strptime(time_str, '%H:%M').time()
+        except ValueError:
+            return None
+    return t
+
+
+def parse_date_string(date_str):
+    """Парсит строку даты (YYYY-MM-DD) в объект datetime.date."""
+    if not date_str:
+        return None
+    try:
+        d = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return None
+    return d
+
+
+# --- Форматирование объектов в JSON ---
+
+def task_to_detailed_json(task):
+    """Преобразует объект Task в детальный формат."""
+    tags_list = task.tags.split(',') if task.tags else []
+
+    return {
+        "id": task.id,
+        "name": task.name,
+        "short_description": task.short_description,
+        "description": task.description,
+        "min_lvl": task.min_lvl,
+        "max_lvl": task.max_lvl,
+        "tags": tags_list,
+        "created_at": task.created_at.isoformat() + 'Z'
+    }
+
+
+def application_to_json(application):
+    """Преобразует объект Application в JSON формат ответа."""
+    return {
+        "id": application.id,
+        "task_id": application.task_id,
+        "created_at": application.created_at.isoformat() + 'Z',
+        "name": application.name,
+        "info": application.info,
+        "game_date": application.game_date.isoformat(),
+        "time_start": application.time_start.isoformat() if application.time_start else None,
+        "time_end": application.time_end.isoformat() if application.time_end else None,
+        "status": application.status
+    }
+
+
+def window_to_json(window):
+    """Преобразует объект Window в JSON формат ответа."""
+    return {
+        "id": window.id,
+        "game_date": window.game_date.isoformat(),
+        "time_start": window.time_start.isoformat() if window.time_start else None,
+        "time_end": window.time_end.isoformat() if window.time_end else None,
+    }
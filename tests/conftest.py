@@ -0,0 +1,35 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+# Корень проекта в sys.path, чтобы импортировать app, config и src
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, setup_database  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def make_app(db_dir):
+    """Создает приложение с отдельными базами в db_dir."""
+
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(db_dir, 'site.db')
+        SQLALCHEMY_BINDS = {'archive': 'sqlite:///' + os.path.join(db_dir, 'archive.db')}
+
+    app = create_app(TestConfig)
+    setup_database(app)
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return make_app(str(tmp_path))
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
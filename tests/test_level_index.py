@@ -0,0 +1,185 @@
+# tests/test_level_index.py
+
+import threading
+from datetime import date
+
+from src.level_index import level_index
+from src.models import db, Task, Application
+from tests.conftest import make_app
+
+
+def create_task(client, name, min_lvl=None, max_lvl=None):
+    response = client.post('/api/admin/tasks', json={
+        "name": name,
+        "short_description": "short",
+        "description": "description",
+        "min_lvl": min_lvl,
+        "max_lvl": max_lvl,
+    })
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def create_application(client, task_id):
+    response = client.post('/api/applications', json={
+        "task_id": task_id,
+        "name": "Игрок",
+        "game_date": "2030-01-01",
+        "time_start": "18:00",
+    })
+    assert response.status_code == 201
+
+
+def names_for_level(client, level):
+    response = client.get(f'/api/tasks/for-level/{level}')
+    assert response.status_code == 200
+    return [task["name"] for task in response.get_json()]
+
+
+def intercept_full_count(app, callback):
+    """
+    Вызывает callback внутри перестройки: после выборки заданий, но до подсчета заявок.
+    Так моделируется запрос из другого потока, пришедший во время перестройки.
+    """
+    state = app.extensions['level_index']
+    original = state._query_counts
+    calls = []
+
+    def query_counts(task_ids=None):
+        if task_ids is None and not calls:
+            calls.append(True)
+            callback()
+        return original(task_ids)
+
+    state._query_counts = query_counts
+
+
+def test_open_ended_ranges_and_ranking(client):
+    create_task(client, "low", None, 3)
+    high = create_task(client, "high", 5, None)
+    everyone = create_task(client, "all")
+    create_application(client, high)
+
+    # При равном количестве заявок порядок - по id
+    assert names_for_level(client, 1) == ["low", "all"]
+    assert names_for_level(client, 20) == ["high", "all"]
+
+    # Новые заявки меняют порядок в уже построенном индексе
+    create_application(client, everyone)
+    create_application(client, everyone)
+    assert names_for_level(client, 1) == ["all", "low"]
+    assert names_for_level(client, 20) == ["all", "high"]
+
+
+def test_add_task_during_rebuild_is_replayed(app, client):
+    create_task(client, "first", 1, 5)
+    assert names_for_level(client, 1) == ["first"]
+
+    def add_concurrently():
+        task = Task(name="second", short_description="s", description="d", min_lvl=1, max_lvl=1)
+        db.session.add(task)
+        db.session.commit()
+        level_index.add_task(task)
+
+    with app.app_context():
+        intercept_full_count(app, add_concurrently)
+        level_index.rebuild()
+
+    # Задание создано после выборки заданий перестройкой - оно есть только благодаря повтору
+    assert sorted(names_for_level(client, 1)) == ["first", "second"]
+
+
+def test_remove_task_during_rebuild_is_replayed(app, client):
+    task_id = create_task(client, "doomed", 1, 5)
+    create_task(client, "kept", 1, 5)
+    assert sorted(names_for_level(client, 1)) == ["doomed", "kept"]
+
+    def delete_concurrently():
+        db.session.get(Task, task_id).is_deleted = True
+        db.session.commit()
+        level_index.remove_task(task_id)
+
+    with app.app_context():
+        intercept_full_count(app, delete_concurrently)
+        level_index.rebuild()
+        assert [tid for tid, _ in level_index.get_tasks_for_level(1)] != []
+        assert task_id not in [tid for tid, _ in level_index.get_tasks_for_level(1)]
+
+
+def test_count_change_during_rebuild_is_not_double_counted(app, client):
+    task_id = create_task(client, "popular", 1, 5)
+    assert names_for_level(client, 1) == ["popular"]
+
+    def apply_concurrently():
+        db.session.add(Application(task_id=task_id, name="p", game_date=date(2030, 1, 1)))
+        db.session.commit()
+        level_index.change_application_count(task_id, 1)
+
+    with app.app_context():
+        intercept_full_count(app, apply_concurrently)
+        level_index.rebuild()
+        # Подсчет при перестройке уже видит заявку, повтор дельты дал бы 2
+        assert level_index.get_tasks_for_level(1) == [(task_id, 1)]
+
+
+def test_stale_index_is_served_while_another_thread_rebuilds(app, client):
+    task_id = create_task(client, "old", 1, 5)
+    assert names_for_level(client, 1) == ["old"]
+
+    state = app.extensions['level_index']
+    result = []
+
+    def read():
+        with app.app_context():
+            result.append(level_index.get_tasks_for_level(1))
+
+    with app.app_context():
+        level_index.invalidate()
+
+    # Другой поток "перестраивает" индекс: читатель не должен его ждать
+    state._rebuild_lock.acquire()
+    try:
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+    finally:
+        state._rebuild_lock.release()
+
+    assert result == [[(task_id, 0)]]
+
+
+def test_apps_do_not_share_index(tmp_path):
+    (tmp_path / "first").mkdir()
+    (tmp_path / "second").mkdir()
+    first_client = make_app(str(tmp_path / "first")).test_client()
+    second_client = make_app(str(tmp_path / "second")).test_client()
+
+    # Оба индекса уже построены, задания добавляются инкрементально
+    names_for_level(first_client, 1)
+    names_for_level(second_client, 1)
+    assert create_task(first_client, "app1", 1, 2) == 1
+    assert create_task(second_client, "app2-lvl10", 10, 10) == 1
+
+    assert names_for_level(second_client, 1) == []
+    assert names_for_level(second_client, 10) == ["app2-lvl10"]
+    assert names_for_level(first_client, 1) == ["app1"]
+
+
+def test_invalid_levels_are_rejected(client):
+    response = client.post('/api/admin/tasks', json={
+        "name": "bad", "short_description": "s", "description": "d", "min_lvl": "3-5",
+    })
+    assert response.status_code == 400
+    assert names_for_level(client, 1) == []
+
+
+def test_bad_stored_level_is_treated_as_open_ended(app, client):
+    create_task(client, "good", 1, 2)
+    with app.app_context():
+        # Такие значения могли остаться в базах, созданных до проверки уровней
+        db.session.add(Task(name="bad", short_description="s", description="d", min_lvl="3-5", max_lvl=4))
+        db.session.commit()
+
+    assert sorted(names_for_level(client, 1)) == ["bad", "good"]
+    assert names_for_level(client, 5) == []